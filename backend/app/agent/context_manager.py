@@ -0,0 +1,151 @@
+"""
+Context management for agent LLM calls.
+
+Keeps the prompt sent to the LLM bounded as a conversation grows:
+- Messages that fall out of the conversation window are folded into a
+  rolling summary, sent as a system message ahead of the recent turns
+- Tool results from older turns are collapsed into one-line summaries
+  (observation masking), since the agent only needs their outcome
+- The history is trimmed to a token budget, keeping the most recent turns
+"""
+from typing import Optional, Sequence
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import trim_messages
+import orjson
+
+# Token budget for conversation history (excluding the system prompt)
+MAX_CONTEXT_TOKENS = 4000
+
+# Number of most recent user turns whose tool results are kept verbatim
+KEEP_TOOL_RESULT_TURNS = 2
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+_SUMMARY_TEMPLATE = """Update the running summary of a conversation between a user and their todo list assistant.
+Keep what the assistant may need later: todo IDs and titles mentioned, user preferences and unfinished requests.
+Reply with the updated summary only, in at most five sentences.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+
+def approximate_token_count(messages: Sequence[BaseMessage]) -> int:
+    """
+    Estimate the token count of messages (~4 characters per token).
+    
+    Avoids loading a tokenizer on the hot path; precision is not needed
+    for a trimming budget.
+    """
+    total = 0
+    for msg in messages:
+        content = msg.content if isinstance(msg.content, str) else str(msg.content)
+        total += len(content) // 4 + 4
+        for tool_call in getattr(msg, "tool_calls", None) or []:
+            total += len(str(tool_call.get("args", ""))) // 4 + 4
+    return total
+
+
+def _summarize_tool_result(msg: ToolMessage) -> str:
+    """Collapse a tool result into a one-line summary."""
+    summary = None
+    if isinstance(msg.content, str) and msg.content[:1] == "{":
+        try:
+            summary = orjson.loads(msg.content).get("message")
+        except orjson.JSONDecodeError:
+            pass
+    return f"{msg.name or 'tool'} returned: {summary or 'result omitted'}"
+
+
+def mask_stale_tool_results(
+    messages: Sequence[BaseMessage],
+    keep_turns: int = KEEP_TOOL_RESULT_TURNS
+) -> list[BaseMessage]:
+    """
+    Replace tool results older than the last `keep_turns` user turns
+    with short summaries.
+    """
+    human_positions = [i for i, msg in enumerate(messages) if isinstance(msg, HumanMessage)]
+    if len(human_positions) <= keep_turns:
+        return list(messages)
+    
+    cutoff = human_positions[-keep_turns]
+    masked = []
+    for i, msg in enumerate(messages):
+        if i < cutoff and isinstance(msg, ToolMessage):
+            msg = ToolMessage(
+                content=_summarize_tool_result(msg),
+                tool_call_id=msg.tool_call_id,
+                name=msg.name
+            )
+        masked.append(msg)
+    return masked
+
+
+def trim_history(
+    messages: Sequence[BaseMessage],
+    max_tokens: int = MAX_CONTEXT_TOKENS
+) -> list[BaseMessage]:
+    """
+    Prepare conversation history for an LLM call.
+    
+    Args:
+        messages: Conversation history (without the system prompt), optionally
+            starting with a summary message
+        max_tokens: Approximate token budget for the history
+    
+    Returns:
+        Masked and trimmed history, always starting on a user message
+    """
+    masked = mask_stale_tool_results(messages)
+    trimmed = trim_messages(
+        masked,
+        max_tokens=max_tokens,
+        strategy="last",
+        token_counter=approximate_token_count,
+        include_system=True,  # Keeps a leading conversation summary
+        start_on="human"
+    )
+    
+    if not any(isinstance(msg, HumanMessage) for msg in trimmed):
+        # The current turn alone exceeds the budget; never drop it
+        human_positions = [i for i, msg in enumerate(masked) if isinstance(msg, HumanMessage)]
+        trimmed = masked[human_positions[-1]:] if human_positions else masked
+    
+    return trimmed
+
+
+def summary_message(summary: str) -> SystemMessage:
+    """Wrap a conversation summary as a message placed before the history."""
+    return SystemMessage(content=SUMMARY_PREFIX + summary)
+
+
+async def summarize_messages(
+    llm: BaseChatModel,
+    messages: Sequence[BaseMessage],
+    summary: Optional[str] = None
+) -> str:
+    """
+    Fold messages leaving the conversation window into the running summary.
+    
+    Args:
+        llm: Chat model used to write the summary
+        messages: Oldest messages being dropped from the window
+        summary: Current summary, if any
+    
+    Returns:
+        The updated summary
+    """
+    lines = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            lines.append(f"User: {msg.content}")
+        elif isinstance(msg, AIMessage) and msg.content:
+            lines.append(f"Assistant: {msg.content}")
+    
+    prompt = _SUMMARY_TEMPLATE.format(summary=summary or "(none)", messages="\n".join(lines))
+    response = await llm.ainvoke([HumanMessage(content=prompt)])
+    return response.content.strip()
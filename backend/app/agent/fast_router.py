@@ -0,0 +1,52 @@
+"""
+Fast intent router for trivial CRUD commands.
+
+Utterances such as "list", "show my todos" or "delete 5" always map to the
+same tool call, so asking the LLM to produce it costs a round trip for no
+benefit. These are matched against a tight grammar here and turned into a
+tool call directly; anything that does not match the whole utterance goes
+through the agent as usual.
+"""
+import re
+from typing import Optional
+from uuid import uuid4
+
+# "list", "show all", "show my todos", "what are my tasks?"
+_LIST_RE = re.compile(
+    r"^\s*(?:please\s+)?(?:list|show|view|display|what\s+are)"
+    r"(?:\s+(?:me|all|of|my|the))*"
+    r"(?:\s+(?:todos?|tasks?|items?|list))?"
+    r"\s*[?.!]*\s*$",
+    re.IGNORECASE
+)
+
+# "delete 5", "remove task 12", "delete todo #3"
+_DELETE_RE = re.compile(
+    r"^\s*(?:please\s+)?(?:delete|remove)\s+(?:(?:todo|task|item)\s+)?(?:#|id\s*)?(\d+)\s*[.!]*\s*$",
+    re.IGNORECASE
+)
+
+
+def _tool_call(name: str, args: dict) -> dict:
+    return {"name": name, "args": args, "id": f"fast_{uuid4().hex}", "type": "tool_call"}
+
+
+def route_intent(user_message: str) -> Optional[dict]:
+    """
+    Match a user message against the fast-path grammar.
+    
+    Args:
+        user_message: The user's input message
+    
+    Returns:
+        A tool call dict for the matched command, or None if the message
+        needs the agent to reason about it
+    """
+    if _LIST_RE.match(user_message):
+        return _tool_call("read_todos", {})
+    
+    match = _DELETE_RE.match(user_message)
+    if match:
+        return _tool_call("delete_todo", {"todo_id": int(match.group(1))})
+    
+    return None
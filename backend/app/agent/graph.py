@@ -16,21 +16,40 @@ ARCHITECTURE RULES ENFORCED:
 - Tools are LangChain tools registered with the agent
 """
 from typing import TypedDict, Annotated, Sequence, Literal
+from functools import lru_cache
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableConfig
 from langchain_groq import ChatGroq
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
-import json
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Optional
+import asyncio
 import operator
+import re
+import orjson
 
 from app.config import get_settings
+from app.database import AsyncSessionLocal
 from app.agent.tools import CRUD_TOOLS
-from app.agent.rag import RAG_TOOLS
+from app.agent.rag import RAG_TOOLS, embed_query, mark_vectorstore_dirty
+from app.agent.semantic_cache import response_cache
+from app.agent.context_manager import trim_history
+from app.agent.fast_router import route_intent
+from app.agent.llm_batcher import LLMBatcher
+from app.agent.serialization import dumps
+from app.todo_cache import invalidate_todo_list
 
 settings = get_settings()
 
+# Tool registry, built once at import
+ALL_TOOLS = CRUD_TOOLS + RAG_TOOLS
+TOOL_BY_NAME = {t.name: t for t in ALL_TOOLS}
+RAG_TOOL_NAMES = frozenset(t.name for t in RAG_TOOLS)
+CRUD_TOOL_NAMES = frozenset(t.name for t in CRUD_TOOLS)
+
 
 # =============================================================================
 # STATE DEFINITION
@@ -43,12 +62,12 @@ class AgentState(TypedDict):
     Attributes:
         messages: Conversation history with user and agent messages
         pending_tool_calls: Tools the agent wants to invoke
-        rag_context: Retrieved context from semantic search (if RAG used)
+        rag_context: Parsed semantic search result (if RAG used)
         needs_rag_synthesis: Flag indicating if second LLM call needed for RAG
     """
     messages: Annotated[Sequence[BaseMessage], add_messages]
     pending_tool_calls: list
-    rag_context: str
+    rag_context: dict
     needs_rag_synthesis: bool
 
 
@@ -87,13 +106,31 @@ SYSTEM_PROMPT = """You are an intelligent Todo Manager AI assistant. Your job is
 
 You have access to these tools: create_todo, read_todos, update_todo, delete_todo, search_todos_semantic"""
 
+# Built once and always sent first, so the prompt prefix is identical across
+# calls and can be reused by the provider's prefix cache
+_SYSTEM_MSG = SystemMessage(content=SYSTEM_PROMPT)
+
+_SYNTHESIS_TEMPLATE = """Based on the semantic search results, provide a helpful response to the user.
+
+Search Query: {query}
+
+Retrieved Todos:
+{results}
+
+Instructions:
+- Summarize or analyze the retrieved todos based on the user's question
+- Be concise and helpful
+- If no relevant todos were found, say so politely
+- Provide insights or suggestions if appropriate"""
+
 
 # =============================================================================
 # LLM INITIALIZATION
 # =============================================================================
 
+@lru_cache()
 def get_llm():
-    """Initialize and return the Groq LLM with streaming enabled."""
+    """Initialize and return the shared Groq LLM with streaming enabled."""
     return ChatGroq(
         api_key=settings.groq_api_key,
         model_name=settings.groq_model,
@@ -102,18 +139,28 @@ def get_llm():
     )
 
 
+@lru_cache()
 def get_llm_with_tools():
-    """Get LLM bound with all available tools."""
+    """Get the shared LLM bound with all available tools (built once)."""
     llm = get_llm()
-    all_tools = CRUD_TOOLS + RAG_TOOLS
-    return llm.bind_tools(all_tools)
+    return llm.bind_tools(ALL_TOOLS)
+
+
+@lru_cache()
+def get_llm_batcher() -> LLMBatcher:
+    """Get the shared micro-batcher for reasoning calls (batches only under concurrency)."""
+    return LLMBatcher(
+        get_llm_with_tools(),
+        max_batch=settings.llm_max_batch,
+        window=settings.llm_batch_window_ms / 1000
+    )
 
 
 # =============================================================================
 # AGENT NODES
 # =============================================================================
 
-def agent_reasoning_node(state: AgentState) -> dict:
+async def agent_reasoning_node(state: AgentState) -> dict:
     """
     PRIMARY AGENT NODE: First LLM call for reasoning and tool selection.
     
@@ -126,34 +173,145 @@ def agent_reasoning_node(state: AgentState) -> dict:
     """
     messages = state.get("messages", [])
     
-    # Build prompt with system message
-    prompt_messages = [SystemMessage(content=SYSTEM_PROMPT)] + list(messages)
+    # Build prompt with system message and a token-bounded history
+    prompt_messages = [_SYSTEM_MSG, *trim_history(messages)]
     
-    # Get LLM with tools bound
-    llm = get_llm_with_tools()
-    
-    # Invoke LLM (this is the FIRST LLM call)
-    response = llm.invoke(prompt_messages)
+    # Invoke LLM with tools bound (this is the FIRST LLM call), batched
+    # with other conversations' calls when several arrive at once
+    response = await get_llm_batcher().ainvoke(prompt_messages)
     
     return {"messages": [response]}
 
 
-def tool_execution_node(state: AgentState) -> dict:
+def fast_route_node(state: AgentState) -> dict:
+    """
+    FAST ROUTE NODE: Emit the tool call for a trivial CRUD command.
+    
+    Replaces the first LLM call for messages matched by the fast router;
+    the agent still formulates the reply from the tool result.
+    """
+    tool_call = route_intent(state["messages"][-1].content)
+    return {"messages": [AIMessage(content="", tool_calls=[tool_call])]}
+
+
+async def _dispatch_tool_call(tool_call: dict, config: RunnableConfig) -> ToolMessage:
+    """Execute a single tool call and wrap its result in a ToolMessage."""
+    name = tool_call["name"]
+    tool = TOOL_BY_NAME.get(name)
+    
+    if tool is None:
+        content = dumps({
+            "success": False,
+            "error": "Unknown tool",
+            "message": f"Unknown tool: {name}"
+        })
+    else:
+        try:
+            content = await tool.ainvoke(tool_call["args"], config=config)
+        except Exception as e:
+            content = dumps({
+                "success": False,
+                "error": str(e),
+                "message": f"Tool {name} failed: {str(e)}"
+            })
+    
+    return ToolMessage(content=content, tool_call_id=tool_call["id"], name=name)
+
+
+def _parse_semantic_search_result(content) -> Optional[dict]:
+    """Parse a tool result if it is a semantic search payload (not an error)."""
+    if not (isinstance(content, str) and content[:1] == "{"):
+        return None
+    try:
+        result = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return None
+    if isinstance(result, dict) and result.get("action") == "semantic_search":
+        return result
+    return None
+
+
+@asynccontextmanager
+async def _step_session(config: RunnableConfig) -> AsyncIterator[AsyncSession]:
+    """Use the caller's session (e.g. one per WebSocket connection) or open one for the step."""
+    session = (config.get("configurable") or {}).get("db_session")
+    if session is not None:
+        yield session
+    else:
+        async with AsyncSessionLocal() as session:
+            yield session
+
+
+async def tool_execution_node(state: AgentState, config: RunnableConfig) -> dict:
     """
     TOOL EXECUTION NODE: Execute tools called by the agent.
     
-    Uses LangGraph's ToolNode for standardized tool execution.
+    Database tools share one session for the step, each in its own
+    savepoint when there are several, and the step commits once. A session
+    cannot run statements concurrently, so those calls run in order; the
+    remaining tools run concurrently alongside them.
     Tools interact directly with the database and return results.
     """
-    all_tools = CRUD_TOOLS + RAG_TOOLS
-    tool_node = ToolNode(all_tools)
-    
-    # Execute tools and return results
-    result = tool_node.invoke(state)
-    return result
-
-
-def rag_synthesis_node(state: AgentState) -> dict:
+    last_message = state["messages"][-1]
+    db_calls = [tc for tc in last_message.tool_calls if tc["name"] in CRUD_TOOL_NAMES]
+    other_calls = [tc for tc in last_message.tool_calls if tc["name"] not in CRUD_TOOL_NAMES]
+    
+    async with _step_session(config) as session:
+        tool_config = {
+            **config,
+            "configurable": {
+                **config.get("configurable", {}),
+                "db_session": session,
+                # Savepoints only isolate calls from each other; a single
+                # call runs on the session directly
+                "db_savepoint": len(db_calls) > 1
+            }
+        }
+        
+        async def run_db_calls() -> list[ToolMessage]:
+            return [await _dispatch_tool_call(tc, tool_config) for tc in db_calls]
+        
+        db_messages, *other_messages = await asyncio.gather(
+            run_db_calls(),
+            *(_dispatch_tool_call(tc, config) for tc in other_calls)
+        )
+        
+        try:
+            await session.commit()
+        except Exception:
+            # Leave a caller-provided session usable for the next step
+            await session.rollback()
+            # Tools already refreshed caches for writes that are now lost
+            response_cache.clear()
+            mark_vectorstore_dirty(full_resync=True)
+            raise
+        finally:
+            # The tools invalidated the caches before the commit; a read in
+            # between may have cached pre-commit data, so invalidate again
+            if any(tc["name"] in MUTATING_TOOL_NAMES for tc in db_calls):
+                response_cache.clear()
+                invalidate_todo_list()
+    
+    # Keep results in the order the agent requested them
+    by_id = {msg.tool_call_id: msg for msg in (*db_messages, *other_messages)}
+    tool_messages = [by_id[tc["id"]] for tc in last_message.tool_calls]
+    
+    update = {"messages": list(tool_messages), "needs_rag_synthesis": False}
+    
+    # Flag successful semantic search results for the RAG synthesis step,
+    # passing the parsed payload on so it is parsed only once; failed
+    # searches go back to the agent like any other tool error
+    for msg in tool_messages:
+        if msg.name in RAG_TOOL_NAMES:
+            rag_results = _parse_semantic_search_result(msg.content)
+            if rag_results is not None:
+                update["needs_rag_synthesis"] = True
+                update["rag_context"] = rag_results
+    
+    return update
+
+
+async def rag_synthesis_node(state: AgentState) -> dict:
     """
     RAG SYNTHESIS NODE: Second LLM call for semantic query responses.
     
@@ -163,43 +321,24 @@ def rag_synthesis_node(state: AgentState) -> dict:
     
     This ensures RAG operations have exactly 2 LLM calls.
     """
-    messages = state.get("messages", [])
-    
-    # Find the last tool message with RAG results
-    rag_results = None
-    for msg in reversed(messages):
-        if isinstance(msg, ToolMessage):
-            try:
-                result = json.loads(msg.content)
-                if result.get("action") == "semantic_search":
-                    rag_results = result
-                    break
-            except (json.JSONDecodeError, KeyError):
-                continue
+    # RAG results were parsed by the tool execution node
+    rag_results = state.get("rag_context")
     
     if not rag_results:
         # No RAG results found, continue without synthesis
         return {"needs_rag_synthesis": False}
     
     # Build synthesis prompt with retrieved context
-    synthesis_prompt = f"""Based on the semantic search results, provide a helpful response to the user.
-
-Search Query: {rag_results.get('query', 'Unknown')}
-
-Retrieved Todos:
-{json.dumps(rag_results.get('results', []), indent=2)}
-
-Instructions:
-- Summarize or analyze the retrieved todos based on the user's question
-- Be concise and helpful
-- If no relevant todos were found, say so politely
-- Provide insights or suggestions if appropriate"""
+    synthesis_prompt = _SYNTHESIS_TEMPLATE.format(
+        query=rag_results.get('query', 'Unknown'),
+        results=orjson.dumps(rag_results.get('results', []), option=orjson.OPT_INDENT_2).decode()
+    )
     
     # Get LLM for synthesis (SECOND LLM call for RAG flows)
     llm = get_llm()
     
-    response = llm.invoke([
-        SystemMessage(content=SYSTEM_PROMPT),
+    response = await llm.ainvoke([
+        _SYSTEM_MSG,
         HumanMessage(content=synthesis_prompt)
     ])
     
@@ -213,6 +352,20 @@ Instructions:
 # ROUTING LOGIC
 # =============================================================================
 
+def route_entry(state: AgentState) -> Literal["fast_route", "agent"]:
+    """
+    Routing function for the entry point.
+    
+    Returns:
+        - "fast_route": If the user message is a trivial CRUD command
+        - "agent": Otherwise
+    """
+    last_message = state["messages"][-1]
+    if isinstance(last_message, HumanMessage) and route_intent(last_message.content):
+        return "fast_route"
+    return "agent"
+
+
 def should_continue(state: AgentState) -> Literal["tool_node", "rag_synthesis", END]:
     """
     Routing function to determine next step after agent reasoning.
@@ -246,19 +399,9 @@ def after_tool_execution(state: AgentState) -> Literal["agent", "rag_synthesis",
         - "agent": If the agent needs to process tool results
         - END: If done
     """
-    messages = state.get("messages", [])
-    
-    # Check if the last tool call was a semantic search (RAG)
-    for msg in reversed(messages):
-        if isinstance(msg, ToolMessage):
-            try:
-                result = json.loads(msg.content)
-                if result.get("action") == "semantic_search":
-                    # RAG was used, need second LLM call for synthesis
-                    return "rag_synthesis"
-            except (json.JSONDecodeError, KeyError):
-                pass
-            break  # Only check the last tool message
+    # Set by the tool execution node when semantic search (RAG) was used
+    if state.get("needs_rag_synthesis"):
+        return "rag_synthesis"
     
     # For CRUD operations, go back to agent to formulate response
     return "agent"
@@ -274,7 +417,10 @@ def build_agent_graph() -> StateGraph:
     
     Graph Structure:
     
-    [START] → [agent_reasoning] → (has tool calls?) → [tool_execution]
+    [START] → (trivial CRUD command?) ── yes ──→ [fast_route] → [tool_execution]
+       |
+       ↓ no
+    [agent_reasoning] → (has tool calls?) → [tool_execution]
                      ↑                    |                    |
                      |                    ↓                    ↓
                      |                  [END]           (was RAG?) 
@@ -289,11 +435,19 @@ def build_agent_graph() -> StateGraph:
     
     # Add nodes
     workflow.add_node("agent", agent_reasoning_node)
+    workflow.add_node("fast_route", fast_route_node)
     workflow.add_node("tool_node", tool_execution_node)
     workflow.add_node("rag_synthesis", rag_synthesis_node)
     
-    # Set entry point
-    workflow.set_entry_point("agent")
+    # Set entry point, skipping the first LLM call for trivial commands
+    workflow.set_conditional_entry_point(
+        route_entry,
+        {
+            "fast_route": "fast_route",
+            "agent": "agent"
+        }
+    )
+    workflow.add_edge("fast_route", "tool_node")
     
     # Add conditional edges from agent
     workflow.add_conditional_edges(
@@ -328,20 +482,81 @@ def build_agent_graph() -> StateGraph:
 agent_graph = build_agent_graph()
 
 
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+
+# Tools whose effects must never be replayed from the response cache
+MUTATING_TOOL_NAMES = frozenset({"create_todo", "update_todo", "delete_todo"})
+
+CACHE_SIMILARITY_THRESHOLD = 0.92
+
+# Queries naming an ID ("todo 5" vs "todo 6") embed almost identically
+_NUMBER_RE = re.compile(r"\d")
+
+
+async def _embed_for_cache(user_message: str, conversation_history: list = None):
+    """
+    Embed the user message for cache lookup, or None if the turn is not
+    cacheable or embedding fails.
+    
+    Only standalone queries are cached: replies that depend on earlier
+    turns ("yes", "the second one") or on a specific ID would be replayed
+    wrongly to other queries that embed the same.
+    """
+    if conversation_history or _NUMBER_RE.search(user_message):
+        return None
+    try:
+        return await asyncio.to_thread(embed_query, user_message)
+    except Exception:
+        return None
+
+
+def _tool_failed(msg: ToolMessage) -> bool:
+    """Check whether a tool result reports a failure."""
+    content = msg.content
+    if not (isinstance(content, str) and content[:1] == "{"):
+        return False
+    try:
+        return orjson.loads(content).get("success") is False
+    except (orjson.JSONDecodeError, AttributeError):
+        return False
+
+
+def _cache_response(embedding, new_messages: list, generation: int) -> None:
+    """Cache the final AI response of a turn unless the turn changed todos or a tool failed."""
+    if embedding is None or not new_messages:
+        return
+    
+    for msg in new_messages:
+        if isinstance(msg, ToolMessage) and (msg.name in MUTATING_TOOL_NAMES or _tool_failed(msg)):
+            return
+    
+    final_message = new_messages[-1]
+    if isinstance(final_message, AIMessage) and final_message.content and not final_message.tool_calls:
+        response_cache.put(embedding, final_message, generation)
+
+
 # =============================================================================
 # AGENT INTERFACE
 # =============================================================================
 
-async def run_agent(user_message: str, conversation_history: list = None):
+async def run_agent(
+    user_message: str,
+    conversation_history: list = None,
+    db_session: Optional[AsyncSession] = None
+):
     """
     Run the agent with a user message and yield streaming responses.
     
     Args:
         user_message: The user's input message
         conversation_history: Optional list of previous messages
-        
+        db_session: Optional session reused by the tools (e.g. per connection)
+    
     Yields:
-        Streaming tokens and final response
+        Response tokens (str) as the LLM generates them, then the final
+        state (dict) with all messages as the last item
     """
     # Build initial state
     messages = []
@@ -352,23 +567,63 @@ async def run_agent(user_message: str, conversation_history: list = None):
     initial_state = {
         "messages": messages,
         "pending_tool_calls": [],
-        "rag_context": "",
+        "rag_context": {},
         "needs_rag_synthesis": False
     }
     
-    # Run the graph
-    async for event in agent_graph.astream(initial_state):
-        yield event
-
-
-async def run_agent_sync(user_message: str, conversation_history: list = None) -> dict:
+    embedding = await _embed_for_cache(user_message, conversation_history)
+    if embedding is not None:
+        cached = response_cache.get(embedding, CACHE_SIMILARITY_THRESHOLD)
+        if cached is not None:
+            yield cached.content
+            yield {**initial_state, "messages": [*messages, cached]}
+            return
+    
+    # Captured before the run so a reply racing a todo change is not cached
+    cache_generation = response_cache.generation
+    
+    # Run the graph, streaming tokens from every LLM call as they arrive
+    final_state = None
+    agent_streamed = False
+    config = {"configurable": {"db_session": db_session}}
+    async for event in agent_graph.astream_events(initial_state, config=config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if content:
+                agent_streamed = True
+                yield content
+        elif kind == "on_chain_start" and event["name"] == "agent":
+            agent_streamed = False
+        elif kind == "on_chain_end" and event["name"] == "agent" and not agent_streamed:
+            # Batched LLM calls do not stream; send the whole reply instead
+            response = event["data"]["output"]["messages"][-1]
+            if response.content and not response.tool_calls:
+                yield response.content
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            # End of the root graph run carries the final state
+            final_state = event["data"]["output"]
+    
+    if final_state is None:
+        raise RuntimeError("Agent run ended without a final state")
+    
+    _cache_response(embedding, final_state["messages"][len(messages):], cache_generation)
+    yield final_state
+
+
+async def run_agent_sync(
+    user_message: str,
+    conversation_history: list = None,
+    db_session: Optional[AsyncSession] = None
+) -> dict:
     """
     Run the agent synchronously and return the final response.
     
     Args:
         user_message: The user's input message
         conversation_history: Optional list of previous messages
-        
+        db_session: Optional session reused by the tools (e.g. per connection)
+    
     Returns:
         Final state with all messages
     """
@@ -380,10 +635,23 @@ async def run_agent_sync(user_message: str, conversation_history: list = None) -
     initial_state = {
         "messages": messages,
         "pending_tool_calls": [],
-        "rag_context": "",
+        "rag_context": {},
         "needs_rag_synthesis": False
     }
     
+    embedding = await _embed_for_cache(user_message, conversation_history)
+    if embedding is not None:
+        cached = response_cache.get(embedding, CACHE_SIMILARITY_THRESHOLD)
+        if cached is not None:
+            return {**initial_state, "messages": [*messages, cached]}
+    
+    # Captured before the run so a reply racing a todo change is not cached
+    cache_generation = response_cache.generation
+    
     # Run the graph and get final state
-    final_state = await agent_graph.ainvoke(initial_state)
+    final_state = await agent_graph.ainvoke(
+        initial_state,
+        config={"configurable": {"db_session": db_session}}
+    )
+    _cache_response(embedding, final_state["messages"][len(messages):], cache_generation)
     return final_state
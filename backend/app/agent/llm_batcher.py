@@ -0,0 +1,108 @@
+"""
+Micro-batching for concurrent LLM calls.
+
+When several conversations reach the reasoning step within a few
+milliseconds of each other, their prompts are collected for a short window
+and sent together with `abatch`, which runs the requests in parallel over
+the client's pooled keep-alive connections.
+
+A call made while no other call is in flight goes straight to the LLM, so
+a single interactive session keeps token streaming and pays no added
+latency. Batched calls run outside the caller's callback context (their
+tokens would otherwise be reported to whichever caller opened the batch),
+so they return complete messages instead of streaming.
+"""
+import asyncio
+import contextvars
+from typing import Optional
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+
+class LLMBatcher:
+    """
+    Debounce queue in front of a chat model runnable.
+    
+    Attributes:
+        runnable: The LLM (usually with tools bound) to invoke
+        max_batch: Maximum number of prompts sent in one batch
+        window: Seconds to wait for more prompts before sending a batch
+    """
+    
+    def __init__(self, runnable: Runnable, max_batch: int = 8, window: float = 0.01):
+        self.runnable = runnable
+        self.max_batch = max_batch
+        self.window = window
+        self._pending: list[tuple[list[BaseMessage], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        self._batch_tasks: set[asyncio.Task] = set()
+    
+    async def ainvoke(self, messages: list[BaseMessage]):
+        """
+        Invoke the LLM, batching with concurrent calls when there are any.
+        
+        Args:
+            messages: Prompt messages for this call
+        
+        Returns:
+            The LLM response message
+        """
+        if self.max_batch <= 1 or (self._in_flight == 0 and not self._pending):
+            self._in_flight += 1
+            try:
+                return await self.runnable.ainvoke(messages)
+            finally:
+                self._in_flight -= 1
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((messages, future))
+        
+        if len(self._pending) >= self.max_batch:
+            self._start_batch()
+        elif self._flush_task is None:
+            # Run the timer in an empty context so the batch is not
+            # attributed to this caller's run
+            self._flush_task = contextvars.Context().run(asyncio.ensure_future, self._flush_after_window())
+        
+        return await future
+    
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        self._start_batch()
+    
+    def _start_batch(self) -> None:
+        """Send everything pending as one batch."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = contextvars.Context().run(asyncio.ensure_future, self._run_batch(batch))
+            # Hold a reference so the task is not garbage collected mid-flight
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _run_batch(self, batch: list[tuple[list[BaseMessage], asyncio.Future]]) -> None:
+        self._in_flight += len(batch)
+        try:
+            results = await self.runnable.abatch(
+                [messages for messages, _ in batch],
+                config={"max_concurrency": self.max_batch},
+                return_exceptions=True
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            self._in_flight -= len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
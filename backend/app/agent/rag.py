@@ -11,15 +11,19 @@ RAG is OPTIONAL and only used for:
 
 RAG is NOT used for CRUD operations.
 """
+import asyncio
 import os
+from datetime import timedelta
+from functools import lru_cache
 from typing import List, Optional
 import chromadb
 from langchain_core.tools import tool
-import json
 
 from app.database import SyncSessionLocal
 from app.models.todo import Todo
 from app.config import get_settings
+from app.agent.embeddings import get_embedding_function
+from app.agent.serialization import dumps
 
 settings = get_settings()
 
@@ -31,68 +35,183 @@ chroma_client = chromadb.PersistentClient(
 # Create or get the todos collection
 COLLECTION_NAME = "todos_collection"
 
+# Embedding model shared by the collection and the agent's response cache
+embedding_function = get_embedding_function()
+
+# Number of documents embedded per model call during sync
+EMBEDDING_BATCH_SIZE = 64
+
+# updated_at is the writing transaction's start time, so a row committed after
+# a sync can carry a timestamp below that sync's watermark. Rows this close to
+# the watermark are re-embedded on every sync to catch such late commits.
+SYNC_WATERMARK_MARGIN = timedelta(minutes=1)
+
+
+COLLECTION_METADATA = {
+    "description": "Todo items for semantic search",
+    # Cosine HNSW: relevance_score (1 - distance) is cosine similarity
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 64
+}
+
 
 def get_or_create_collection():
     """Get or create the ChromaDB collection for todos."""
     try:
-        collection = chroma_client.get_collection(name=COLLECTION_NAME)
+        collection = chroma_client.get_collection(
+            name=COLLECTION_NAME,
+            embedding_function=embedding_function
+        )
     except Exception:
-        collection = chroma_client.create_collection(
+        collection = None
+    
+    # The distance space is fixed at creation, so collections created with
+    # the default l2 space are rebuilt; every todo is re-embedded by the
+    # next sync
+    if collection is not None and (collection.metadata or {}).get("hnsw:space") != "cosine":
+        chroma_client.delete_collection(name=COLLECTION_NAME)
+        mark_vectorstore_dirty(full_resync=True)
+        collection = None
+    
+    if collection is None:
+        collection = chroma_client.get_or_create_collection(
             name=COLLECTION_NAME,
-            metadata={"description": "Todo items for semantic search"}
+            embedding_function=embedding_function,
+            metadata=COLLECTION_METADATA
         )
     return collection
 
 
+@lru_cache(maxsize=1024)
+def _embed(text: str) -> tuple:
+    """Embed a single string, memoized (stored as a tuple so it is hashable)."""
+    return tuple(float(x) for x in embedding_function([text])[0])
+
+
+def embed_query(text: str) -> List[float]:
+    """Embed a single query string with the collection's embedding model."""
+    return list(_embed(text))
+
+
+# Incremental sync state: newest updated_at already embedded, and whether
+# the vector store may be behind the database
+_sync_state = {"last_sync_ts": None, "dirty": True}
+
+
+def _vector_id(todo_id: int) -> str:
+    """Vector store ID for a todo."""
+    return f"todo_{todo_id}"
+
+
+def _todo_document(todo: Todo) -> tuple[str, dict]:
+    """Build the embedded document text and metadata for a todo."""
+    # Combine title and description for better semantic matching
+    doc_text = f"{todo.title}"
+    if todo.description:
+        doc_text += f". {todo.description}"
+    
+    metadata = {
+        "id": todo.id,
+        "title": todo.title,
+        "description": todo.description or "",
+        "created_at": todo.created_at.isoformat() if todo.created_at else ""
+    }
+    return doc_text, metadata
+
+
+def mark_vectorstore_dirty(full_resync: bool = False):
+    """
+    Flag the vector store as out of date so the next search syncs it.
+    
+    Args:
+        full_resync: Re-embed every todo instead of only changed ones
+    """
+    _sync_state["dirty"] = True
+    if full_resync:
+        _sync_state["last_sync_ts"] = None
+
+
+def upsert_todo_vector(todo: Todo):
+    """Eagerly (re)embed a single todo after it was created or updated."""
+    try:
+        doc_text, metadata = _todo_document(todo)
+        get_or_create_collection().upsert(
+            documents=[doc_text],
+            metadatas=[metadata],
+            ids=[_vector_id(todo.id)]
+        )
+    except Exception:
+        mark_vectorstore_dirty()
+
+
+def delete_todo_vector(todo_id: int):
+    """Eagerly remove a deleted todo from the vector store."""
+    try:
+        get_or_create_collection().delete(ids=[_vector_id(todo_id)])
+    except Exception:
+        mark_vectorstore_dirty()
+
+
 def sync_todos_to_vectorstore():
     """
-    Synchronize all todos from PostgreSQL to the vector store.
-    Called periodically to keep vectors up to date.
+    Incrementally synchronize todos from PostgreSQL to the vector store.
+    
+    Only todos updated since the last sync are re-embedded; vectors for
+    todos that no longer exist in the database are removed.
     """
+    # Cleared up front so changes made during the sync mark it dirty again
+    _sync_state["dirty"] = False
+    
     session = SyncSessionLocal()
     try:
-        todos = session.query(Todo).all()
         collection = get_or_create_collection()
         
-        # Clear existing entries
-        try:
-            existing = collection.get()
-            if existing and existing['ids']:
-                collection.delete(ids=existing['ids'])
-        except Exception:
-            pass
-        
-        if not todos:
-            return {"synced": 0, "message": "No todos to sync"}
+        query = session.query(Todo)
+        if _sync_state["last_sync_ts"] is not None:
+            query = query.filter(Todo.updated_at > _sync_state["last_sync_ts"] - SYNC_WATERMARK_MARGIN)
+        changed = query.all()
         
-        # Prepare documents for embedding
-        documents = []
-        metadatas = []
-        ids = []
-        
-        for todo in todos:
-            # Combine title and description for better semantic matching
-            doc_text = f"{todo.title}"
-            if todo.description:
-                doc_text += f". {todo.description}"
+        if changed:
+            documents = []
+            metadatas = []
+            ids = []
+            for todo in changed:
+                doc_text, metadata = _todo_document(todo)
+                documents.append(doc_text)
+                metadatas.append(metadata)
+                ids.append(_vector_id(todo.id))
             
-            documents.append(doc_text)
-            metadatas.append({
-                "id": todo.id,
-                "title": todo.title,
-                "description": todo.description or "",
-                "created_at": todo.created_at.isoformat() if todo.created_at else ""
-            })
-            ids.append(f"todo_{todo.id}")
+            # Embed in batches so the model encodes many documents per call
+            for start in range(0, len(documents), EMBEDDING_BATCH_SIZE):
+                end = start + EMBEDDING_BATCH_SIZE
+                batch = documents[start:end]
+                collection.upsert(
+                    embeddings=embedding_function(batch),
+                    documents=batch,
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+            _sync_state["last_sync_ts"] = max(
+                (todo.updated_at for todo in changed if todo.updated_at),
+                default=_sync_state["last_sync_ts"]
+            )
         
-        # Add to collection (ChromaDB auto-embeds using default model)
-        collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        # Remove vectors for todos deleted since the last sync
+        db_ids = {_vector_id(todo_id) for (todo_id,) in session.query(Todo.id)}
+        stale_ids = [vid for vid in collection.get(include=[])["ids"] if vid not in db_ids]
+        if stale_ids:
+            collection.delete(ids=stale_ids)
         
-        return {"synced": len(todos), "message": f"Synced {len(todos)} todos to vector store"}
+        return {
+            "synced": len(changed),
+            "deleted": len(stale_ids),
+            "message": f"Synced {len(changed)} todos to vector store"
+        }
+    except Exception:
+        mark_vectorstore_dirty()
+        raise
     finally:
         session.close()
 
@@ -104,12 +223,13 @@ def semantic_search_todos(query: str, n_results: int = 5) -> List[dict]:
     Args:
         query: Natural language query
         n_results: Maximum number of results to return
-        
+    
     Returns:
         List of matching todos with relevance scores
     """
-    # First sync todos to ensure vector store is up to date
-    sync_todos_to_vectorstore()
+    # Sync only if the database changed outside the CRUD tools
+    if _sync_state["dirty"]:
+        sync_todos_to_vectorstore()
     
     collection = get_or_create_collection()
     
@@ -120,7 +240,7 @@ def semantic_search_todos(query: str, n_results: int = 5) -> List[dict]:
     
     # Perform semantic search
     results = collection.query(
-        query_texts=[query],
+        query_embeddings=[embed_query(query)],
         n_results=min(n_results, count)
     )
     
@@ -141,7 +261,7 @@ def semantic_search_todos(query: str, n_results: int = 5) -> List[dict]:
 
 
 @tool
-def search_todos_semantic(query: str) -> str:
+async def search_todos_semantic(query: str) -> str:
     """
     Search todos using semantic/meaning-based matching.
     
@@ -158,15 +278,16 @@ def search_todos_semantic(query: str) -> str:
     
     Args:
         query: Natural language query describing what to search for
-        
+    
     Returns:
         JSON string with matching todos and their relevance scores
     """
     try:
-        results = semantic_search_todos(query)
+        # Embedding and ChromaDB are blocking, keep them off the event loop
+        results = await asyncio.to_thread(semantic_search_todos, query)
         
         if not results:
-            return json.dumps({
+            return dumps({
                 "success": True,
                 "action": "semantic_search",
                 "results": [],
@@ -175,7 +296,7 @@ def search_todos_semantic(query: str) -> str:
                 "query": query
             })
         
-        return json.dumps({
+        return dumps({
             "success": True,
             "action": "semantic_search",
             "results": results,
@@ -184,7 +305,7 @@ def search_todos_semantic(query: str) -> str:
             "query": query
         })
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "success": False,
             "error": str(e),
             "message": f"Semantic search failed: {str(e)}"
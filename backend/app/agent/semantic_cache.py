@@ -0,0 +1,179 @@
+"""
+Semantic response cache for the agent.
+
+Caches final agent responses keyed by the embedding of the user query, so
+paraphrased repeats ("show my todos" / "list tasks") are answered without
+another LLM round trip.
+
+Lookup is a nearest-neighbour search over L2-normalized embeddings using a
+FAISS inner-product index (inner product == cosine similarity). Small caches
+use an exact flat index; past HNSW_MIN_ENTRIES the index is rebuilt as HNSW
+so lookups stay sub-millisecond as the cache grows. Entries expire after a
+TTL and the least recently used entries are evicted once the cache is full.
+
+`clear()` bumps a generation counter. Callers capture it before computing a
+response and pass it to `put()`, so a response computed from data that
+changed meanwhile is dropped instead of cached.
+"""
+import time
+from typing import Optional, Sequence
+
+import faiss
+import numpy as np
+from langchain_core.messages import AIMessage
+
+# Entry count above which the flat index is replaced by HNSW
+HNSW_MIN_ENTRIES = 1000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 100
+HNSW_EF_SEARCH = 64
+
+
+class SemanticCache:
+    """
+    In-memory semantic cache of agent responses.
+    
+    Attributes:
+        maxsize: Maximum number of cached responses
+        ttl: Seconds before a cached response expires
+        threshold: Minimum cosine similarity for a cache hit
+        generation: Incremented on every clear()
+    """
+    
+    def __init__(self, maxsize: int = 1000, ttl: float = 300.0, threshold: float = 0.92):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.generation = 0
+        self._index: Optional[faiss.Index] = None
+        # Parallel lists, aligned with the positions in the FAISS index
+        self._vectors: list[np.ndarray] = []
+        self._responses: list[AIMessage] = []
+        self._created_at: list[float] = []
+        self._last_access: list[float] = []
+    
+    def __len__(self) -> int:
+        return len(self._responses)
+    
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Convert an embedding to a normalized float32 row vector."""
+        vector = np.asarray(embedding, dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+    
+    @property
+    def _uses_hnsw(self) -> bool:
+        return isinstance(self._index, faiss.IndexHNSWFlat)
+    
+    def _rebuild_index(self, dim: int) -> None:
+        """Rebuild the index from the stored vectors, as HNSW when large."""
+        if len(self._vectors) > HNSW_MIN_ENTRIES:
+            self._index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            self._index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            self._index.hnsw.efSearch = HNSW_EF_SEARCH
+        else:
+            self._index = faiss.IndexFlatIP(dim)
+        if self._vectors:
+            self._index.add(np.vstack(self._vectors))
+    
+    def _remove(self, positions: list[int]) -> None:
+        """Remove entries at the given positions from the index and lists."""
+        if not positions:
+            return
+        for pos in sorted(positions, reverse=True):
+            del self._vectors[pos]
+            del self._responses[pos]
+            del self._created_at[pos]
+            del self._last_access[pos]
+        
+        # HNSW does not support removal, so it is rebuilt instead
+        if self._uses_hnsw:
+            self._rebuild_index(self._index.d)
+        else:
+            self._index.remove_ids(np.asarray(positions, dtype="int64"))
+    
+    def _evict_expired(self, now: float) -> None:
+        """Drop entries older than the TTL."""
+        expired = [i for i, ts in enumerate(self._created_at) if now - ts > self.ttl]
+        self._remove(expired)
+    
+    def get(self, embedding: Sequence[float], threshold: Optional[float] = None) -> Optional[AIMessage]:
+        """
+        Look up a cached response for a query embedding.
+        
+        Args:
+            embedding: Embedding of the user query
+            threshold: Optional similarity threshold overriding the default
+        
+        Returns:
+            The cached AIMessage on a hit, otherwise None
+        """
+        if not self._responses:
+            return None
+        
+        now = time.monotonic()
+        self._evict_expired(now)
+        if not self._responses:
+            return None
+        
+        scores, positions = self._index.search(self._normalize(embedding), 1)
+        score, pos = float(scores[0][0]), int(positions[0][0])
+        if pos < 0 or score < (self.threshold if threshold is None else threshold):
+            return None
+        
+        self._last_access[pos] = now
+        return self._responses[pos]
+    
+    def put(
+        self,
+        embedding: Sequence[float],
+        response: AIMessage,
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        Cache a response for a query embedding.
+        
+        Args:
+            embedding: Embedding of the user query
+            response: Final AI response to cache
+            generation: Cache generation captured before the response was
+                computed; the response is dropped if the cache was cleared since
+        """
+        if generation is not None and generation != self.generation:
+            return
+        
+        vector = self._normalize(embedding)
+        if self._index is None:
+            self._index = faiss.IndexFlatIP(vector.shape[1])
+        
+        now = time.monotonic()
+        self._evict_expired(now)
+        if len(self._responses) >= self.maxsize:
+            # Evict in batches under HNSW to amortize the rebuild
+            count = max(1, len(self._responses) // 10) if self._uses_hnsw else 1
+            by_access = sorted(range(len(self._last_access)), key=self._last_access.__getitem__)
+            self._remove(by_access[:count])
+        
+        self._vectors.append(vector)
+        self._responses.append(response)
+        self._created_at.append(now)
+        self._last_access.append(now)
+        
+        if not self._uses_hnsw and len(self._vectors) > HNSW_MIN_ENTRIES:
+            self._rebuild_index(vector.shape[1])
+        else:
+            self._index.add(vector)
+    
+    def clear(self) -> None:
+        """Drop all cached responses (e.g. after todos change)."""
+        self.generation += 1
+        self._index = None
+        self._vectors.clear()
+        self._responses.clear()
+        self._created_at.clear()
+        self._last_access.clear()
+
+
+# Shared cache used by the agent interface
+response_cache = SemanticCache()
@@ -0,0 +1,12 @@
+"""
+JSON serialization helpers for agent tool payloads.
+
+Uses orjson, which is much faster than the stdlib json module and
+serializes datetimes natively.
+"""
+import orjson
+
+
+def dumps(obj) -> str:
+    """Serialize an object to a JSON string."""
+    return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY).decode()
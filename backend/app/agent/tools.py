@@ -5,24 +5,100 @@ These tools are registered with the LangGraph agent and perform
 direct database operations. Each tool returns structured results
 that the agent uses to formulate responses.
 
-IMPORTANT: These tools execute synchronously within the agent workflow.
+IMPORTANT: These tools are async and use the async database session,
+so they never block the event loop while the agent is running. When the
+tool execution node provides a shared session for the graph step (via
+`config["configurable"]["db_session"]`), the tools run on it and the node
+commits once for the whole step; when the step has several database
+calls, each runs in its own savepoint.
 """
+from contextlib import asynccontextmanager
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from sqlalchemy.orm import Session
-from typing import Optional
-import json
+from sqlalchemy import String, Text, bindparam, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Optional
+import asyncio
 
-from app.database import SyncSessionLocal
+from app.database import AsyncSessionLocal
 from app.models.todo import Todo
+from app.agent.semantic_cache import response_cache
+from app.todo_cache import TODO_LIST_JSON_STMT, invalidate_todo_list
+from app.agent.rag import upsert_todo_vector, delete_todo_vector
+from app.agent.serialization import dumps
 
 
-def get_db_session() -> Session:
-    """Get a new database session for tool operations."""
-    return SyncSessionLocal()
+# Columns returned by writes (RETURNING) so no follow-up SELECT is needed
+_TODO_COLUMNS = (Todo.id, Todo.title, Todo.description, Todo.created_at, Todo.updated_at)
+
+# Statements with fixed SQL text, built once: SQLAlchemy compiles each once
+# and asyncpg reuses its server-side prepared statement on every call
+_GET_BY_ID_STMT = select(*_TODO_COLUMNS).where(Todo.id == bindparam("todo_id"))
+
+_INSERT_STMT = (
+    insert(Todo)
+    .values(title=bindparam("new_title"), description=bindparam("new_description"))
+    .returning(*_TODO_COLUMNS)
+)
+
+# NULL parameters keep the current value, so one statement covers any
+# combination of changed fields
+_UPDATE_STMT = (
+    update(Todo)
+    .where(Todo.id == bindparam("todo_id"))
+    .values(
+        title=func.coalesce(bindparam("new_title", type_=String), Todo.title),
+        description=func.coalesce(bindparam("new_description", type_=Text), Todo.description)
+    )
+    .returning(*_TODO_COLUMNS)
+    .execution_options(synchronize_session=False)
+)
+
+_DELETE_STMT = (
+    delete(Todo)
+    .where(Todo.id == bindparam("todo_id"))
+    .returning(Todo.title)
+    .execution_options(synchronize_session=False)
+)
+
+
+@asynccontextmanager
+async def get_db_session(config: Optional[RunnableConfig] = None) -> AsyncIterator[AsyncSession]:
+    """
+    Get a database session for a tool operation.
+    
+    Uses the graph step's shared session when one is configured (inside a
+    savepoint if the step runs several database calls), otherwise opens a
+    new session. Either way the work is committed when the block exits
+    cleanly and rolled back on error.
+    """
+    configurable = (config or {}).get("configurable") or {}
+    shared_session = configurable.get("db_session")
+    
+    if shared_session is not None:
+        if configurable.get("db_savepoint"):
+            async with shared_session.begin_nested():
+                yield shared_session
+        else:
+            # Sole database call of the step: the savepoint would only add
+            # round trips, so roll back the whole transaction on error
+            try:
+                yield shared_session
+            except Exception:
+                await shared_session.rollback()
+                raise
+    else:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                yield session
 
 
 @tool
-def create_todo(title: str, description: Optional[str] = None) -> str:
+async def create_todo(
+    title: str,
+    description: Optional[str] = None,
+    config: RunnableConfig = None
+) -> str:
     """
     Create a new todo item in the database.
     
@@ -32,41 +108,38 @@ def create_todo(title: str, description: Optional[str] = None) -> str:
     Args:
         title: The title/name of the todo task (required)
         description: Optional detailed description of the task
-        
+    
     Returns:
         JSON string with the created todo details or error message
     """
-    session = get_db_session()
     try:
-        # Create new todo instance
-        new_todo = Todo(
-            title=title,
-            description=description
-        )
-        session.add(new_todo)
-        session.commit()
-        session.refresh(new_todo)
-        
-        result = {
-            "success": True,
-            "action": "created",
-            "todo": new_todo.to_dict(),
-            "message": f"Successfully created todo: '{title}'"
-        }
-        return json.dumps(result)
+        async with get_db_session(config) as session:
+            # INSERT ... RETURNING gives server defaults without a refresh
+            new_todo = (await session.execute(
+                _INSERT_STMT, {"new_title": title, "new_description": description}
+            )).one()
     except Exception as e:
-        session.rollback()
-        return json.dumps({
+        return dumps({
             "success": False,
             "error": str(e),
             "message": f"Failed to create todo: {str(e)}"
         })
-    finally:
-        session.close()
+    
+    response_cache.clear()
+    invalidate_todo_list()
+    await asyncio.to_thread(upsert_todo_vector, new_todo)
+    
+    result = {
+        "success": True,
+        "action": "created",
+        "todo": new_todo._asdict(),
+        "message": f"Successfully created todo: '{title}'"
+    }
+    return dumps(result)
 
 
 @tool
-def read_todos() -> str:
+async def read_todos(config: RunnableConfig = None) -> str:
     """
     Read and return all todos from the database.
     
@@ -76,34 +149,29 @@ def read_todos() -> str:
     Returns:
         JSON string with list of all todos or error message
     """
-    session = get_db_session()
     try:
-        todos = session.query(Todo).order_by(Todo.created_at.desc()).all()
-        todos_list = [todo.to_dict() for todo in todos]
-        
-        result = {
-            "success": True,
-            "action": "read",
-            "todos": todos_list,
-            "count": len(todos_list),
-            "message": f"Found {len(todos_list)} todo(s)"
-        }
-        return json.dumps(result)
+        async with get_db_session(config) as session:
+            todos_json, count = (await session.execute(TODO_LIST_JSON_STMT)).one()
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "success": False,
             "error": str(e),
             "message": f"Failed to read todos: {str(e)}"
         })
-    finally:
-        session.close()
+    
+    # Splice the database-built JSON in as-is instead of re-parsing it
+    return (
+        f'{{"success": true, "action": "read", "todos": {todos_json}, '
+        f'"count": {count}, "message": "Found {count} todo(s)"}}'
+    )
 
 
 @tool
-def update_todo(
+async def update_todo(
     todo_id: int,
     title: Optional[str] = None,
-    description: Optional[str] = None
+    description: Optional[str] = None,
+    config: RunnableConfig = None
 ) -> str:
     """
     Update an existing todo item in the database.
@@ -115,50 +183,52 @@ def update_todo(
         todo_id: The ID of the todo to update (required)
         title: New title for the todo (optional)
         description: New description for the todo (optional)
-        
+    
     Returns:
         JSON string with the updated todo details or error message
     """
-    session = get_db_session()
+    changed = title is not None or description is not None
+    
     try:
-        todo = session.query(Todo).filter(Todo.id == todo_id).first()
-        
-        if not todo:
-            return json.dumps({
-                "success": False,
-                "error": "Todo not found",
-                "message": f"No todo found with ID {todo_id}"
-            })
-        
-        # Update fields if provided
-        if title is not None:
-            todo.title = title
-        if description is not None:
-            todo.description = description
-            
-        session.commit()
-        session.refresh(todo)
-        
-        result = {
-            "success": True,
-            "action": "updated",
-            "todo": todo.to_dict(),
-            "message": f"Successfully updated todo ID {todo_id}"
-        }
-        return json.dumps(result)
+        async with get_db_session(config) as session:
+            if changed:
+                # UPDATE ... RETURNING gives the new row without a refresh
+                todo = (await session.execute(
+                    _UPDATE_STMT,
+                    {"todo_id": todo_id, "new_title": title, "new_description": description}
+                )).one_or_none()
+            else:
+                todo = (await session.execute(_GET_BY_ID_STMT, {"todo_id": todo_id})).one_or_none()
     except Exception as e:
-        session.rollback()
-        return json.dumps({
+        return dumps({
             "success": False,
             "error": str(e),
             "message": f"Failed to update todo: {str(e)}"
         })
-    finally:
-        session.close()
+    
+    if not todo:
+        return dumps({
+            "success": False,
+            "error": "Todo not found",
+            "message": f"No todo found with ID {todo_id}"
+        })
+    
+    if changed:
+        response_cache.clear()
+        invalidate_todo_list()
+        await asyncio.to_thread(upsert_todo_vector, todo)
+    
+    result = {
+        "success": True,
+        "action": "updated",
+        "todo": todo._asdict(),
+        "message": f"Successfully updated todo ID {todo_id}"
+    }
+    return dumps(result)
 
 
 @tool
-def delete_todo(todo_id: int) -> str:
+async def delete_todo(todo_id: int, config: RunnableConfig = None) -> str:
     """
     Delete a todo item from the database.
     
@@ -167,42 +237,40 @@ def delete_todo(todo_id: int) -> str:
     
     Args:
         todo_id: The ID of the todo to delete (required)
-        
+    
     Returns:
         JSON string confirming deletion or error message
     """
-    session = get_db_session()
     try:
-        todo = session.query(Todo).filter(Todo.id == todo_id).first()
-        
-        if not todo:
-            return json.dumps({
-                "success": False,
-                "error": "Todo not found",
-                "message": f"No todo found with ID {todo_id}"
-            })
-        
-        todo_title = todo.title
-        session.delete(todo)
-        session.commit()
-        
-        result = {
-            "success": True,
-            "action": "deleted",
-            "deleted_id": todo_id,
-            "deleted_title": todo_title,
-            "message": f"Successfully deleted todo: '{todo_title}' (ID: {todo_id})"
-        }
-        return json.dumps(result)
+        async with get_db_session(config) as session:
+            # DELETE ... RETURNING removes the row and reads its title at once
+            todo_title = (await session.execute(_DELETE_STMT, {"todo_id": todo_id})).scalar_one_or_none()
     except Exception as e:
-        session.rollback()
-        return json.dumps({
+        return dumps({
             "success": False,
             "error": str(e),
             "message": f"Failed to delete todo: {str(e)}"
         })
-    finally:
-        session.close()
+    
+    if todo_title is None:
+        return dumps({
+            "success": False,
+            "error": "Todo not found",
+            "message": f"No todo found with ID {todo_id}"
+        })
+    
+    response_cache.clear()
+    invalidate_todo_list()
+    await asyncio.to_thread(delete_todo_vector, todo_id)
+    
+    result = {
+        "success": True,
+        "action": "deleted",
+        "deleted_id": todo_id,
+        "deleted_title": todo_title,
+        "message": f"Successfully deleted todo: '{todo_title}' (ID: {todo_id})"
+    }
+    return dumps(result)
 
 
 # Export all tools as a list for easy registration with the agent
@@ -4,7 +4,8 @@ Uses SQLAlchemy async for non-blocking database operations.
 """
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
 
@@ -13,11 +14,24 @@ settings = get_settings()
 # Convert postgresql:// to postgresql+asyncpg:// for async support
 async_database_url = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
 
+# Per-connection prepared statement caches, sized to hold every fixed query
+# so repeated CRUD calls skip parsing and planning on the server
+STATEMENT_CACHE_SIZE = 256
+
 # Async engine for FastAPI endpoints
 async_engine = create_async_engine(
     async_database_url,
-    echo=True,  # Set to False in production
-    future=True
+    echo=settings.sql_echo,
+    future=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=True,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={
+        "statement_cache_size": STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": STATEMENT_CACHE_SIZE
+    }
 )
 
 # Async session factory
@@ -27,10 +41,20 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
-# Sync engine for LangChain tools (some operations need sync)
+# The sync engine only serves the vector store sync thread, so a small pool
+# keeps its connections from adding to the async engine's share of the
+# server's max_connections
+SYNC_POOL_SIZE = 2
+SYNC_MAX_OVERFLOW = 2
+
+# Sync engine for the vector store sync (runs in a worker thread)
 sync_engine = create_engine(
     settings.database_url,
-    echo=True
+    echo=settings.sql_echo,
+    pool_size=SYNC_POOL_SIZE,
+    max_overflow=SYNC_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=settings.db_pool_recycle
 )
 
 SyncSessionLocal = sessionmaker(
@@ -58,7 +82,21 @@ def get_sync_session():
         session.close()
 
 
+# Indexes dropped from the models that may still exist in older databases
+OBSOLETE_INDEXES = ["ix_todos_title"]
+
+
+def _sync_indexes(conn):
+    """Create model indexes missing from existing tables (create_all skips them)."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
 async def init_db():
-    """Initialize database tables."""
+    """Initialize database tables and indexes."""
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_sync_indexes)
+        for index_name in OBSOLETE_INDEXES:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
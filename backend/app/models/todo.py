@@ -2,7 +2,7 @@
 Todo model for PostgreSQL database.
 Defines the schema for storing todo items.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -21,11 +21,18 @@ class Todo(Base):
     __tablename__ = "todos"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    title = Column(String(255), nullable=False, index=True)
+    title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # Newest-first listing (read_todos, REST and WebSocket todo lists)
+        Index("ix_todos_created_at_desc", created_at.desc()),
+        # Incremental vector store sync (updated_at > last sync)
+        Index("ix_todos_updated_at", updated_at),
+    )
+    
     def to_dict(self) -> dict:
         """Convert model to dictionary for JSON serialization."""
         return {
@@ -2,29 +2,34 @@
 REST API endpoints for todos.
 Provides direct CRUD operations for the frontend Todo list UI.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from typing import List
+import asyncio
 
 from app.database import get_async_session
 from app.models.todo import Todo
+from app.agent.semantic_cache import response_cache
+from app.todo_cache import get_todo_list_json, invalidate_todo_list
+from app.agent.rag import upsert_todo_vector, delete_todo_vector
 from app.schemas import TodoCreate, TodoUpdate, TodoResponse
 
 router = APIRouter(prefix="/api/todos", tags=["todos"])
 
 
-@router.get("/", response_model=List[TodoResponse])
-async def get_all_todos(session: AsyncSession = Depends(get_async_session)):
-    """Get all todos."""
-    result = await session.execute(
-        select(Todo).order_by(Todo.created_at.desc())
-    )
-    todos = result.scalars().all()
-    return todos
+@router.get("/", response_class=Response, responses={200: {"model": List[TodoResponse]}})
+async def get_all_todos():
+    """
+    Get all todos.
+    
+    Serves the shared pre-serialized todo list directly, skipping ORM
+    loading and per-row response model validation.
+    """
+    return Response(content=await get_todo_list_json(), media_type="application/json")
 
 
-@router.get("/{todo_id}", response_model=TodoResponse)
+@router.get("/{todo_id}", response_model=TodoResponse, response_model_exclude_none=True)
 async def get_todo(todo_id: int, session: AsyncSession = Depends(get_async_session)):
     """Get a specific todo by ID."""
     result = await session.execute(
@@ -38,44 +43,52 @@ async def get_todo(todo_id: int, session: AsyncSession = Depends(get_async_sessi
     return todo
 
 
-@router.post("/", response_model=TodoResponse)
+@router.post("/", response_model=TodoResponse, response_model_exclude_none=True)
 async def create_todo(
     todo_data: TodoCreate,
     session: AsyncSession = Depends(get_async_session)
 ):
     """Create a new todo."""
-    todo = Todo(
-        title=todo_data.title,
-        description=todo_data.description
+    # INSERT ... RETURNING gives server defaults without a refresh
+    result = await session.execute(
+        insert(Todo)
+        .values(title=todo_data.title, description=todo_data.description)
+        .returning(Todo)
     )
-    session.add(todo)
+    todo = result.scalar_one()
     await session.commit()
-    await session.refresh(todo)
+    response_cache.clear()
+    invalidate_todo_list()
+    await asyncio.to_thread(upsert_todo_vector, todo)
     return todo
 
 
-@router.put("/{todo_id}", response_model=TodoResponse)
+@router.put("/{todo_id}", response_model=TodoResponse, response_model_exclude_none=True)
 async def update_todo(
     todo_id: int,
     todo_data: TodoUpdate,
     session: AsyncSession = Depends(get_async_session)
 ):
     """Update an existing todo."""
+    values = todo_data.model_dump(exclude_none=True)
+    
+    if not values:
+        # Nothing to change, just return the current row
+        return await get_todo(todo_id, session)
+    
+    # Single UPDATE ... RETURNING instead of SELECT + UPDATE + refresh
     result = await session.execute(
-        select(Todo).where(Todo.id == todo_id)
+        update(Todo).where(Todo.id == todo_id).values(**values).returning(Todo)
     )
     todo = result.scalar_one_or_none()
     
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
     
-    if todo_data.title is not None:
-        todo.title = todo_data.title
-    if todo_data.description is not None:
-        todo.description = todo_data.description
-    
     await session.commit()
-    await session.refresh(todo)
+    response_cache.clear()
+    invalidate_todo_list()
+    await asyncio.to_thread(upsert_todo_vector, todo)
     return todo
 
 
@@ -86,14 +99,15 @@ async def delete_todo(
 ):
     """Delete a todo."""
     result = await session.execute(
-        select(Todo).where(Todo.id == todo_id)
+        delete(Todo).where(Todo.id == todo_id).returning(Todo.id)
     )
-    todo = result.scalar_one_or_none()
     
-    if not todo:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Todo not found")
     
-    await session.delete(todo)
     await session.commit()
+    response_cache.clear()
+    invalidate_todo_list()
+    await asyncio.to_thread(delete_todo_vector, todo_id)
     
     return {"message": "Todo deleted successfully", "id": todo_id}
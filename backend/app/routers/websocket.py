@@ -6,34 +6,52 @@ Handles:
 - Message streaming from agent to frontend
 - Conversation state management per session
 """
+from collections import deque
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-import json
+from typing import Optional
 import asyncio
+import orjson
 
-from app.agent import run_agent_sync
+from app.agent import run_agent
+from app.agent.graph import MUTATING_TOOL_NAMES, get_llm
+from app.agent.context_manager import summarize_messages, summary_message
 from app.agent.tools import CRUD_TOOLS
-from app.database import SyncSessionLocal
-from app.models.todo import Todo
+from app.database import AsyncSessionLocal
+from app.todo_cache import get_todo_list_json
 
 router = APIRouter()
 
+# Messages kept verbatim per conversation; once exceeded, the oldest are
+# folded into a rolling summary down to SUMMARY_KEEP_MESSAGES
+MAX_HISTORY_MESSAGES = 20
+SUMMARY_KEEP_MESSAGES = 10
+SUMMARY_TIMEOUT = 30  # Seconds a summarization call may take before it is abandoned
+
+# Constant control frames, encoded once at import
+_THINKING_FRAME = orjson.dumps({"type": "thinking", "content": "Processing your request..."})
+_EMPTY_MESSAGE_FRAME = orjson.dumps({"type": "error", "content": "Please enter a message"})
+_INVALID_MESSAGE_FRAME = orjson.dumps({"type": "error", "content": "Invalid message format"})
+
 
 class ConnectionManager:
     """
     Manages WebSocket connections and conversation state.
-    Each connection maintains its own conversation history.
+    Each connection maintains its own conversation history: recent messages
+    verbatim plus a summary of older ones.
     """
     
     def __init__(self):
         self.active_connections: dict[str, WebSocket] = {}
-        self.conversation_histories: dict[str, list] = {}
+        self.conversation_histories: dict[str, deque] = {}
+        self.summaries: dict[str, str] = {}
+        self.compaction_tasks: dict[str, asyncio.Task] = {}
     
     async def connect(self, websocket: WebSocket, client_id: str):
         """Accept connection and initialize conversation state."""
         await websocket.accept()
         self.active_connections[client_id] = websocket
-        self.conversation_histories[client_id] = []
+        self.conversation_histories[client_id] = deque()
     
     def disconnect(self, client_id: str):
         """Clean up connection and state on disconnect."""
@@ -41,35 +59,103 @@ class ConnectionManager:
             del self.active_connections[client_id]
         if client_id in self.conversation_histories:
             del self.conversation_histories[client_id]
+        self.summaries.pop(client_id, None)
+        task = self.compaction_tasks.pop(client_id, None)
+        if task is not None:
+            task.cancel()
     
     def get_history(self, client_id: str) -> list:
-        """Get conversation history for a client."""
-        return self.conversation_histories.get(client_id, [])
+        """Get conversation history for a client, led by its summary if any."""
+        history = list(self.conversation_histories.get(client_id, ()))
+        summary = self.summaries.get(client_id)
+        return [summary_message(summary), *history] if summary else history
     
-    def add_to_history(self, client_id: str, message):
-        """Add a message to conversation history."""
-        if client_id in self.conversation_histories:
-            self.conversation_histories[client_id].append(message)
-            # Keep only last 20 messages to prevent context overflow
-            if len(self.conversation_histories[client_id]) > 20:
-                self.conversation_histories[client_id] = self.conversation_histories[client_id][-20:]
+    def schedule_compaction(self, client_id: str):
+        """
+        Fold the oldest messages into the summary once the window is full.
+        
+        Runs as a background task so the next message is not held up by the
+        summarization call; at most one runs per client at a time.
+        """
+        history = self.conversation_histories.get(client_id)
+        if history is None or len(history) <= MAX_HISTORY_MESSAGES or client_id in self.compaction_tasks:
+            return
+        
+        # Pops from the left are O(1) on the deque; done before any await so
+        # messages appended meanwhile stay in the window
+        dropped = [history.popleft() for _ in range(len(history) - SUMMARY_KEEP_MESSAGES)]
+        task = asyncio.create_task(self._summarize(client_id, dropped))
+        self.compaction_tasks[client_id] = task
+        task.add_done_callback(lambda _: self.compaction_tasks.pop(client_id, None))
+    
+    async def _summarize(self, client_id: str, dropped: list):
+        """Update a client's summary with messages dropped from the window."""
+        try:
+            self.summaries[client_id] = await asyncio.wait_for(
+                summarize_messages(get_llm(), dropped, self.summaries.get(client_id)),
+                SUMMARY_TIMEOUT
+            )
+        except Exception:
+            # Keep the previous summary; the dropped messages are lost as
+            # they were with plain truncation
+            pass
     
     async def send_message(self, websocket: WebSocket, message: dict):
-        """Send JSON message to client."""
-        await websocket.send_json(message)
+        """Send JSON message to client (orjson-encoded, as a binary frame)."""
+        await websocket.send_bytes(orjson.dumps(message))
+    
+    async def broadcast(self, frame: bytes, exclude: Optional[str] = None):
+        """Send one pre-encoded frame to every connected client concurrently."""
+        await asyncio.gather(
+            *(ws.send_bytes(frame) for cid, ws in self.active_connections.items() if cid != exclude),
+            return_exceptions=True
+        )
 
 
 manager = ConnectionManager()
 
 
-def get_all_todos() -> list:
-    """Fetch all todos from database for UI refresh."""
-    session = SyncSessionLocal()
-    try:
-        todos = session.query(Todo).order_by(Todo.created_at.desc()).all()
-        return [todo.to_dict() for todo in todos]
-    finally:
-        session.close()
+async def get_all_todos() -> orjson.Fragment:
+    """
+    Fetch all todos for UI refresh.
+    
+    Returns the shared pre-serialized list, spliced into outgoing frames
+    as-is so it is not re-encoded per client.
+    """
+    return orjson.Fragment(await get_todo_list_json())
+
+
+async def receive_payload(websocket: WebSocket):
+    """
+    Receive one client frame and parse it with orjson.
+    
+    Accepts binary and text frames (browsers send JSON as text).
+    
+    Raises:
+        WebSocketDisconnect: If the client disconnected
+        orjson.JSONDecodeError: If the frame is not valid JSON
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    
+    raw = message.get("bytes")
+    return orjson.loads(raw if raw is not None else message.get("text") or "")
+
+
+def todos_changed(state: dict) -> bool:
+    """Check whether the agent run changed any todos."""
+    return any(
+        isinstance(msg, ToolMessage) and msg.name in MUTATING_TOOL_NAMES
+        for msg in state.get("messages", [])
+    )
+
+
+def _format_todo_line(todo: dict) -> str:
+    """Format a todo as a bullet line (without the trailing newline)."""
+    if todo.get('description'):
+        return f"• [{todo['id']}] {todo['title']} - {todo['description']}"
+    return f"• [{todo['id']}] {todo['title']}"
 
 
 def extract_response_content(state: dict) -> tuple[str, bool]:
@@ -80,55 +166,60 @@ def extract_response_content(state: dict) -> tuple[str, bool]:
         Tuple of (response_text, was_tool_used)
     """
     messages = state.get("messages", [])
-    tool_was_used = False
     response_content = ""
+    last_tool_msg = None
     
-    # Look through messages to build response
-    for msg in messages:
+    # Single pass from the end: latest AI response with content and latest tool result
+    for msg in reversed(messages):
         if isinstance(msg, ToolMessage):
-            tool_was_used = True
-        elif isinstance(msg, AIMessage):
+            if last_tool_msg is None:
+                last_tool_msg = msg
+        elif isinstance(msg, AIMessage) and not response_content:
             # If AI message has content (not just tool calls), use it
             if msg.content and isinstance(msg.content, str) and msg.content.strip():
                 response_content = msg.content
+        if last_tool_msg is not None and response_content:
+            break
+    
+    tool_was_used = last_tool_msg is not None
     
     # If tool was used but no final AI response, construct one from tool results
     if tool_was_used and not response_content:
-        for msg in reversed(messages):
-            if isinstance(msg, ToolMessage):
-                try:
-                    result = json.loads(msg.content)
-                    if result.get("success"):
-                        response_content = result.get("message", "Operation completed successfully.")
-                        
-                        # Add details for read operations
-                        if result.get("action") == "read":
-                            todos = result.get("todos", [])
-                            if todos:
-                                response_content += "\n\nHere are your todos:\n"
-                                for todo in todos:
-                                    response_content += f"• [{todo['id']}] {todo['title']}"
-                                    if todo.get('description'):
-                                        response_content += f" - {todo['description']}"
-                                    response_content += "\n"
-                            else:
-                                response_content = "Your todo list is empty. Would you like to add a task?"
-                        
-                        # Add details for semantic search
-                        elif result.get("action") == "semantic_search":
-                            results = result.get("results", [])
-                            if results:
-                                response_content += "\n\nRelevant todos:\n"
-                                for todo in results:
-                                    response_content += f"• [{todo['id']}] {todo['title']}"
-                                    if todo.get('description'):
-                                        response_content += f" - {todo['description']}"
-                                    response_content += f" (relevance: {todo.get('relevance_score', 0):.2f})\n"
-                    else:
-                        response_content = result.get("message", "Operation failed.")
-                except (json.JSONDecodeError, KeyError):
-                    response_content = msg.content
-                break
+        content = last_tool_msg.content
+        if not (isinstance(content, str) and content[:1] == "{"):
+            # Not a JSON result object; use the tool output as-is
+            response_content = content
+        else:
+            try:
+                result = orjson.loads(content)
+                if result.get("success"):
+                    response_content = result.get("message", "Operation completed successfully.")
+                    
+                    # Add details for read operations
+                    if result.get("action") == "read":
+                        todos = result.get("todos", [])
+                        if todos:
+                            parts = [response_content, "\n\nHere are your todos:\n"]
+                            for todo in todos:
+                                parts.append(_format_todo_line(todo))
+                                parts.append("\n")
+                            response_content = "".join(parts)
+                        else:
+                            response_content = "Your todo list is empty. Would you like to add a task?"
+                    
+                    # Add details for semantic search
+                    elif result.get("action") == "semantic_search":
+                        results = result.get("results", [])
+                        if results:
+                            parts = [response_content, "\n\nRelevant todos:\n"]
+                            for todo in results:
+                                parts.append(_format_todo_line(todo))
+                                parts.append(f" (relevance: {todo.get('relevance_score', 0):.2f})\n")
+                            response_content = "".join(parts)
+                else:
+                    response_content = result.get("message", "Operation failed.")
+            except (orjson.JSONDecodeError, KeyError):
+                response_content = content
     
     # Fallback
     if not response_content:
@@ -155,67 +246,75 @@ async def websocket_chat_endpoint(websocket: WebSocket):
     
     await manager.connect(websocket, client_id)
     
-    # Send initial todos
-    try:
-        initial_todos = get_all_todos()
-        await manager.send_message(websocket, {
-            "type": "todos_update",
-            "content": "Connected to Todo Agent",
-            "todos": initial_todos
-        })
-    except Exception as e:
-        await manager.send_message(websocket, {
-            "type": "error",
-            "content": f"Failed to load todos: {str(e)}"
-        })
+    # Bound once for the hot paths below instead of per message/frame
+    history = manager.conversation_histories[client_id]
+    send_bytes = websocket.send_bytes
+    encode = orjson.dumps
+    
+    # One session for the connection's lifetime, reused by every agent turn;
+    # it holds a pooled connection only while a transaction is open
+    db_session = AsyncSessionLocal()
     
     try:
+        # Send initial todos (inside the try so a client that is already
+        # gone is still cleaned up)
+        try:
+            initial_todos = await get_all_todos()
+            await manager.send_message(websocket, {
+                "type": "todos_update",
+                "content": "Connected to Todo Agent",
+                "todos": initial_todos
+            })
+        except Exception as e:
+            await manager.send_message(websocket, {
+                "type": "error",
+                "content": f"Failed to load todos: {str(e)}"
+            })
+        
         while True:
-            # Receive message from client
-            data = await websocket.receive_json()
-            user_message = data.get("message", "").strip()
+            # Receive message from client. Silently dropped clients are
+            # detected by the server's protocol-level ping/pong, which raises
+            # WebSocketDisconnect here
+            try:
+                data = await receive_payload(websocket)
+            except orjson.JSONDecodeError:
+                data = None
+            
+            if not isinstance(data, dict):
+                await send_bytes(_INVALID_MESSAGE_FRAME)
+                continue
+            
+            user_message = str(data.get("message") or "").strip()
             
             if not user_message:
-                await manager.send_message(websocket, {
-                    "type": "error",
-                    "content": "Please enter a message"
-                })
+                await send_bytes(_EMPTY_MESSAGE_FRAME)
                 continue
             
-            # Add user message to history
-            manager.add_to_history(client_id, HumanMessage(content=user_message))
+            # Snapshot prior conversation history, then record the user message
+            prior_history = manager.get_history(client_id)
+            history.append(HumanMessage(content=user_message))
             
             # Send acknowledgment
-            await manager.send_message(websocket, {
-                "type": "thinking",
-                "content": "Processing your request..."
-            })
+            await send_bytes(_THINKING_FRAME)
             
             try:
-                # Get conversation history
-                history = manager.get_history(client_id)
-                
-                # Run the agent
-                final_state = await run_agent_sync(user_message, history[:-1])  # Exclude the message we just added
+                # Run the agent, forwarding each token as it is generated;
+                # the last item yielded is the final state
+                final_state = {}
+                async for item in run_agent(user_message, prior_history, db_session):
+                    if isinstance(item, str):
+                        await send_bytes(encode({"type": "token", "content": item}))
+                    else:
+                        final_state = item
                 
                 # Extract response
                 response_content, tool_was_used = extract_response_content(final_state)
                 
                 # Add AI response to history
-                manager.add_to_history(client_id, AIMessage(content=response_content))
-                
-                # Stream the response token by token for effect
-                # (In production with true streaming, you'd yield actual tokens)
-                tokens = response_content.split()
-                for i, token in enumerate(tokens):
-                    await manager.send_message(websocket, {
-                        "type": "token",
-                        "content": token + (" " if i < len(tokens) - 1 else "")
-                    })
-                    await asyncio.sleep(0.02)  # Small delay for streaming effect
+                history.append(AIMessage(content=response_content))
                 
                 # Get updated todos if a tool was used
-                updated_todos = get_all_todos() if tool_was_used else None
+                updated_todos = await get_all_todos() if tool_was_used else None
                 
                 # Send completion message
                 await manager.send_message(websocket, {
@@ -224,6 +323,13 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                     "todos": updated_todos
                 })
                 
+                # Push the new list to every other client, encoded once for all
+                if todos_changed(final_state):
+                    await manager.broadcast(
+                        encode({"type": "todos_update", "todos": updated_todos}),
+                        exclude=client_id
+                    )
+            
             except Exception as e:
                 error_msg = f"Agent error: {str(e)}"
                 await manager.send_message(websocket, {
@@ -231,10 +337,16 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                     "content": error_msg
                 })
                 # Add error to history for context
-                manager.add_to_history(client_id, AIMessage(content=f"Error occurred: {error_msg}"))
+                history.append(AIMessage(content=f"Error occurred: {error_msg}"))
+            
+            # Summarize overflow in the background so the next message is read immediately
+            manager.schedule_compaction(client_id)
     
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        pass
     except Exception as e:
-        manager.disconnect(client_id)
         # Connection already closed, can't send error message
+        pass
+    finally:
+        manager.disconnect(client_id)
+        await db_session.close()
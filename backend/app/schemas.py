@@ -1,33 +1,36 @@
 """
 Pydantic schemas for request/response validation.
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 
 
 class TodoCreate(BaseModel):
     """Schema for creating a new todo."""
+    model_config = ConfigDict(extra="forbid")
+    
     title: str = Field(..., min_length=1, max_length=255, description="Todo title")
     description: Optional[str] = Field(None, description="Todo description")
 
 
 class TodoUpdate(BaseModel):
     """Schema for updating an existing todo."""
+    model_config = ConfigDict(extra="forbid")
+    
     title: Optional[str] = Field(None, min_length=1, max_length=255, description="New title")
     description: Optional[str] = Field(None, description="New description")
 
 
 class TodoResponse(BaseModel):
-    """Schema for todo response."""
+    """Schema for todo response (null fields may be omitted)."""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     title: str
-    description: Optional[str]
-    created_at: Optional[datetime]
-    updated_at: Optional[datetime]
-    
-    class Config:
-        from_attributes = True
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
 
 class ChatMessage(BaseModel):
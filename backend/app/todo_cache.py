@@ -0,0 +1,51 @@
+"""
+Shared cache of the serialized todo list.
+
+The full todo list is sent to every WebSocket client on connect and after
+each change. It is built once as JSON bytes and reused until the list
+changes; writers bump a version counter via `invalidate_todo_list()`
+after committing, and the next read rebuilds the payload.
+"""
+from typing import Optional
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal
+
+# Builds the todo list JSON and its length inside PostgreSQL, newest first,
+# skipping ORM hydration and per-row serialization in Python. Shared with the
+# agent's read_todos tool so every todo list has the same shape.
+TODO_LIST_JSON_STMT = text("""
+    SELECT coalesce(json_agg(t ORDER BY t.created_at DESC), '[]'::json)::text, count(*)
+    FROM (SELECT id, title, description, created_at, updated_at FROM todos) t
+""")
+
+_todos_version = 0
+_todos_cache: Optional[tuple[int, bytes]] = None
+
+
+def invalidate_todo_list():
+    """Mark the cached todo list stale (call after todos change)."""
+    global _todos_version
+    _todos_version += 1
+
+
+async def get_todo_list_json() -> bytes:
+    """
+    Get all todos as a JSON array, newest first.
+
+    Returns:
+        UTF-8 JSON bytes, shared across callers until the list changes
+    """
+    global _todos_cache
+    version = _todos_version
+    if _todos_cache is not None and _todos_cache[0] == version:
+        return _todos_cache[1]
+
+    async with AsyncSessionLocal() as session:
+        todos_json, _ = (await session.execute(TODO_LIST_JSON_STMT)).one()
+
+    payload = todos_json.encode()
+    # Tagged with the version read before the query, so a change committed
+    # meanwhile leaves this entry stale rather than hiding the change
+    _todos_cache = (version, payload)
+    return payload
@@ -62,8 +62,9 @@ app.add_middleware(
         "http://127.0.0.1:3000",
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
 # Register routers
@@ -91,9 +92,16 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
+    # loop/http "auto" pick uvloop and httptools when installed (uvicorn[standard]
+    # installs uvloop only off Windows) and fall back to asyncio/h11 otherwise.
+    # A single worker: the response, todo list and vector store caches are
+    # per-process and would go stale across workers.
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=True,
+        loop="auto",
+        http="auto",
+        ws="websockets"
     )
@@ -15,6 +15,9 @@ const WS_BASE = import.meta.env.VITE_WS_URL || API_BASE.replace(/^http/, 'ws');
 // Final WebSocket URL
 const WS_URL = `${WS_BASE}/ws/chat`;
 
+// Server frames are UTF-8 JSON sent as binary messages
+const textDecoder = new TextDecoder();
+
 /**
  * Connection states
  */
@@ -52,6 +55,7 @@ export function useWebSocket() {
 
     try {
       const ws = new WebSocket(WS_URL);
+      ws.binaryType = 'arraybuffer';
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -62,7 +66,8 @@ export function useWebSocket() {
 
       ws.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
+          const text = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+          const data = JSON.parse(text);
           handleMessage(data);
         } catch (error) {
           console.error('Failed to parse message:', error);